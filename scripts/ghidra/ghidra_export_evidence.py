@@ -11,58 +11,62 @@ Usage (headless):
 
 import json
 import time
+from itertools import islice
 
+from ghidra.program.model.listing import Data, Function
 from ghidra.program.util import DefinedDataIterator
 
 
 def collect_functions(program):
-    manager = program.getFunctionManager()
-    iterator = manager.getFunctions(True)
-    items = []
-    while iterator.hasNext():
-        func = iterator.next()
-        items.append(
-            {
-                "name": func.getName(),
-                "entry": str(func.getEntryPoint()),
-                "size": int(func.getBody().getNumAddresses()),
-            }
-        )
-    items.sort(key=lambda item: item["entry"])
-    return items
+    # Let Jython drain the Java iterator in one pass instead of dispatching
+    # hasNext()/next() from Python for every function.
+    functions = list(program.getFunctionManager().getFunctions(True))
+    # Bind the Java getters once; each attribute lookup on a Java object is a
+    # reflective call in Jython.
+    get_entry = Function.getEntryPoint
+    get_name = Function.getName
+    get_body = Function.getBody
+    entries = [(get_entry(func), func) for func in functions]
+    entries.sort(key=lambda pair: pair[0].getOffset())
+    return [
+        {
+            "name": get_name(func),
+            "entry": str(entry),
+            "size": int(get_body(func).getNumAddresses()),
+        }
+        for entry, func in entries
+    ]
 
 
 def collect_imports(program):
-    symbol_table = program.getSymbolTable()
-    iterator = symbol_table.getExternalSymbols()
-    names = set()
-    while iterator.hasNext():
-        symbol = iterator.next()
-        names.add(symbol.getName())
-    return sorted(list(names))
+    symbols = list(program.getSymbolTable().getExternalSymbols())
+    return sorted(set(symbol.getName() for symbol in symbols))
 
 
 def collect_strings(program, limit):
-    strings = []
-    for data in DefinedDataIterator.definedStrings(program):
-        value = data.getValue()
-        if value is None:
-            continue
-        strings.append(
-            {
-                "address": str(data.getAddress()),
-                "value": str(value)[:256],
-            }
-        )
-        if len(strings) >= limit:
-            break
-    strings.sort(key=lambda item: item["address"])
-    return strings
+    get_address = Data.getAddress
+    get_value = Data.getValue
+    pairs = (
+        (get_address(data), get_value(data))
+        for data in DefinedDataIterator.definedStrings(program)
+    )
+    found = list(islice((pair for pair in pairs if pair[1] is not None), limit))
+    found.sort(key=lambda pair: pair[0].getOffset())
+    return [
+        {
+            "address": str(address),
+            "value": str(value)[:256],
+        }
+        for address, value in found
+    ]
 
 
 def write_json(path, payload):
-    with open(path, "w") as handle:
-        handle.write(json.dumps(payload, indent=2, sort_keys=True))
+    # Stream through a large buffer instead of building the whole document as
+    # one string. Keys stay sorted: Jython 2.7 dicts do not keep insertion
+    # order, so sort_keys is what keeps the output deterministic.
+    with open(path, "w", 1 << 20) as handle:
+        json.dump(payload, handle, indent=2, sort_keys=True)
         handle.write("\n")
 
 
@@ -9,11 +9,22 @@ Each scene entry must include ref, test, out_dir, and id.
 from __future__ import annotations
 
 import argparse
-import json
+import functools
+import os
 import subprocess
 import sys
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from itertools import islice
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
+
+from check_summary import ValidationError
+from check_summary import run as check_summary_run
+from jsonio import read_json, write_json
+
+
+COMPARE_SCRIPT = str(Path(__file__).with_name("compare_av.py"))
+CHECK_SCRIPT = str(Path(__file__).with_name("check_summary.py"))
 
 
 class BatchError(Exception):
@@ -23,18 +34,90 @@ class BatchError(Exception):
 def load_manifest(path: Path) -> Dict[str, Any]:
     if not path.exists():
         raise BatchError(f"Manifest not found: {path}")
-    return json.loads(path.read_text())
+    return read_json(path)
+
+
+@functools.lru_cache(maxsize=None)
+def resolve_path(base_dir: Path, value: str) -> str:
+    # Scenes often share inputs and thresholds files; cache so each distinct
+    # path is only resolved (a realpath walk) once per batch.
+    path = Path(value)
+    if path.is_absolute():
+        return value
+    return str((base_dir / path).resolve())
 
 
 def run_command(cmd: List[str]) -> int:
     return subprocess.call(cmd)
 
 
+def run_check(summary_path: str, threshold_path: str, isolate: bool) -> int:
+    if isolate:
+        return run_command(
+            [
+                sys.executable,
+                CHECK_SCRIPT,
+                summary_path,
+                "--thresholds",
+                threshold_path,
+            ]
+        )
+    # Mirror the exit codes of the subprocess path: 2 for a ValidationError,
+    # 1 for anything that would have crashed the child (e.g. malformed JSON).
+    try:
+        return check_summary_run(Path(summary_path), Path(threshold_path))
+    except ValidationError as exc:
+        print(f"error: {exc}", file=sys.stderr)
+        return 2
+    except Exception as exc:
+        print(f"error: check failed for {summary_path}: {exc!r}", file=sys.stderr)
+        return 1
+
+
+def run_scene(job: Dict[str, Any], isolate: bool) -> Dict[str, Any]:
+    status = run_command(job["compare_cmd"])
+
+    check_status = None
+    pass_fail_path = None
+    if job["thresholds"] is not None:
+        check_status = run_check(job["summary"], job["thresholds"], isolate)
+        pass_fail_path = str(Path(job["summary"]).with_name("pass_fail.json"))
+
+    return {
+        "id": job["id"],
+        "compare_status": status,
+        "check_status": check_status,
+        "summary": job["summary"],
+        "pass_fail": pass_fail_path,
+    }
+
+
+def scene_failed(result: Dict[str, Any]) -> bool:
+    check_status = result["check_status"]
+    return result["compare_status"] != 0 or (check_status is not None and check_status != 0)
+
+
 def main() -> int:
     parser = argparse.ArgumentParser(description="Batch compare A/V scenes from a manifest.")
     parser.add_argument("manifest", help="Path to manifest JSON")
-    parser.add_argument("--stop-on-fail", action="store_true", help="Stop after first failure")
+    parser.add_argument(
+        "--stop-on-fail",
+        action="store_true",
+        help="Start no new scenes after the first failure (scenes already running finish)",
+    )
     parser.add_argument("--thresholds", help="Thresholds JSON applied to all scenes")
+    parser.add_argument("--no-vmaf", action="store_true", help="Skip VMAF for all scenes")
+    parser.add_argument(
+        "--isolate-children",
+        action="store_true",
+        help="Run threshold checks in a separate Python process per scene",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Number of scenes to compare in parallel (default: CPU count)",
+    )
 
     args = parser.parse_args()
 
@@ -43,9 +126,11 @@ def main() -> int:
     if not isinstance(scenes, list) or not scenes:
         raise BatchError("Manifest must include a non-empty 'scenes' array")
 
+    if args.jobs < 1:
+        raise BatchError("--jobs must be at least 1")
+
     base_dir = Path(args.manifest).resolve().parent
-    results = []
-    failures = 0
+    jobs: List[Dict[str, Any]] = []
 
     for scene in scenes:
         if not isinstance(scene, dict):
@@ -60,13 +145,13 @@ def main() -> int:
         if not ref or not test or not out_dir:
             raise BatchError(f"Scene {scene_id} missing ref/test/out_dir")
 
-        ref_path = str((base_dir / ref).resolve()) if not Path(ref).is_absolute() else ref
-        test_path = str((base_dir / test).resolve()) if not Path(test).is_absolute() else test
-        out_path = str((base_dir / out_dir).resolve()) if not Path(out_dir).is_absolute() else out_dir
+        ref_path = resolve_path(base_dir, ref)
+        test_path = resolve_path(base_dir, test)
+        out_path = resolve_path(base_dir, out_dir)
 
         compare_cmd = [
             sys.executable,
-            str(Path(__file__).with_name("compare_av.py")),
+            COMPARE_SCRIPT,
             "--ref",
             ref_path,
             "--test",
@@ -81,44 +166,50 @@ def main() -> int:
             if key in scene and scene[key] is not None:
                 compare_cmd.extend([f"--{key.replace('_', '-')}", str(scene[key])])
 
-        if scene.get("no_vmaf"):
+        if args.no_vmaf or scene.get("no_vmaf"):
             compare_cmd.append("--no-vmaf")
 
-        status = run_command(compare_cmd)
         summary_path = str(Path(out_path) / "summary.json")
 
         threshold_file = scene.get("thresholds") or args.thresholds
-        check_status = None
-        pass_fail_path = None
+        threshold_path: Optional[str] = None
         if threshold_file:
-            threshold_path = (
-                str((base_dir / threshold_file).resolve())
-                if not Path(threshold_file).is_absolute()
-                else threshold_file
-            )
-            check_cmd = [
-                sys.executable,
-                str(Path(__file__).with_name("check_summary.py")),
-                summary_path,
-                "--thresholds",
-                threshold_path,
-            ]
-            check_status = run_command(check_cmd)
-            pass_fail_path = str(Path(summary_path).with_name("pass_fail.json"))
-
-        scene_result = {
-            "id": scene_id,
-            "compare_status": status,
-            "check_status": check_status,
-            "summary": summary_path,
-            "pass_fail": pass_fail_path,
+            threshold_path = resolve_path(base_dir, threshold_file)
+
+        jobs.append(
+            {
+                "id": scene_id,
+                "compare_cmd": compare_cmd,
+                "thresholds": threshold_path,
+                "summary": summary_path,
+            }
+        )
+
+    # Scenes are independent ffmpeg runs, so overlap them across cores. At most
+    # --jobs scenes are in flight; with --stop-on-fail no new scene starts once
+    # one has failed, while scenes already running are allowed to finish.
+    completed: Dict[int, Dict[str, Any]] = {}
+    queue = iter(enumerate(jobs))
+    stopping = False
+    with ThreadPoolExecutor(max_workers=args.jobs) as executor:
+        running: Dict[Future, int] = {
+            executor.submit(run_scene, job, args.isolate_children): index
+            for index, job in islice(queue, args.jobs)
         }
-        results.append(scene_result)
-
-        if status != 0 or (check_status is not None and check_status != 0):
-            failures += 1
-            if args.stop_on_fail:
-                break
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                index = running.pop(future)
+                result = future.result()
+                completed[index] = result
+                if args.stop_on_fail and scene_failed(result):
+                    stopping = True
+            if not stopping:
+                for index, job in islice(queue, len(done)):
+                    running[executor.submit(run_scene, job, args.isolate_children)] = index
+
+    results = [completed[index] for index in sorted(completed)]
+    failures = sum(1 for result in results if scene_failed(result))
 
     output = {
         "manifest": str(Path(args.manifest).resolve()),
@@ -128,7 +219,7 @@ def main() -> int:
     }
 
     output_path = Path(args.manifest).with_name("batch_summary.json")
-    output_path.write_text(json.dumps(output, indent=2))
+    write_json(output_path, output)
     print(f"Wrote {output_path}")
 
     return 1 if failures else 0
@@ -6,10 +6,11 @@ Convert an A/V comparison summary.json into pass/fail based on thresholds.
 from __future__ import annotations
 
 import argparse
-import json
 import sys
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Tuple
+
+from jsonio import read_json, write_json
 
 
 DEFAULT_THRESHOLDS = {
@@ -21,6 +22,15 @@ DEFAULT_THRESHOLDS = {
 }
 
 
+SSIM_AVG = ("video", "ssim", "average")
+PSNR_AVG = ("video", "psnr", "average")
+VMAF_AVG = ("video", "vmaf", "average")
+REF_LUFS = ("audio", "reference", "integrated_lufs")
+TEST_LUFS = ("audio", "test", "integrated_lufs")
+REF_PEAK = ("audio", "reference", "true_peak_dbtp")
+TEST_PEAK = ("audio", "test", "true_peak_dbtp")
+
+
 class ValidationError(Exception):
     pass
 
@@ -28,34 +38,31 @@ class ValidationError(Exception):
 def load_json(path: Path) -> Dict[str, Any]:
     if not path.exists():
         raise ValidationError(f"File not found: {path}")
-    return json.loads(path.read_text())
+    return read_json(path)
 
 
-def get_metric(summary: Dict[str, Any], key_path: str) -> Optional[float]:
+def get_metric(summary: Dict[str, Any], keys: Tuple[str, ...]) -> Optional[float]:
     current: Any = summary
-    for key in key_path.split("."):
-        if not isinstance(current, dict) or key not in current:
+    for key in keys:
+        if not isinstance(current, dict):
             return None
-        current = current[key]
+        current = current.get(key)
     if isinstance(current, (int, float)):
         return float(current)
     return None
 
 
-def main() -> int:
-    parser = argparse.ArgumentParser(description="Check summary.json against thresholds.")
-    parser.add_argument("summary", help="Path to summary.json")
-    parser.add_argument("--thresholds", help="Path to thresholds.json")
-    parser.add_argument("--out", help="Output JSON path", default="")
-    parser.add_argument("--strict", action="store_true", help="Fail if a metric is missing")
-
-    args = parser.parse_args()
-
-    summary = load_json(Path(args.summary))
+def run(
+    summary_path: Path,
+    thresholds_path: Optional[Path] = None,
+    out_path: Optional[Path] = None,
+    strict: bool = False,
+) -> int:
+    summary = load_json(summary_path)
 
     thresholds = dict(DEFAULT_THRESHOLDS)
-    if args.thresholds:
-        thresholds.update(load_json(Path(args.thresholds)))
+    if thresholds_path is not None:
+        thresholds.update(load_json(thresholds_path))
 
     results = []
     failures = 0
@@ -65,7 +72,7 @@ def main() -> int:
         status = "pass"
         if value is None:
             status = "missing"
-            if args.strict:
+            if strict:
                 failures += 1
         elif value < threshold:
             status = "fail"
@@ -77,23 +84,23 @@ def main() -> int:
         status = "pass"
         if value is None:
             status = "missing"
-            if args.strict:
+            if strict:
                 failures += 1
         elif value > threshold:
             status = "fail"
             failures += 1
         results.append({"metric": label, "value": value, "threshold": threshold, "status": status})
 
-    ssim_avg = get_metric(summary, "video.ssim.average")
-    psnr_avg = get_metric(summary, "video.psnr.average")
-    vmaf_avg = get_metric(summary, "video.vmaf.average")
+    ssim_avg = get_metric(summary, SSIM_AVG)
+    psnr_avg = get_metric(summary, PSNR_AVG)
+    vmaf_avg = get_metric(summary, VMAF_AVG)
 
-    ref_lufs = get_metric(summary, "audio.reference.integrated_lufs")
-    test_lufs = get_metric(summary, "audio.test.integrated_lufs")
+    ref_lufs = get_metric(summary, REF_LUFS)
+    test_lufs = get_metric(summary, TEST_LUFS)
     lufs_delta = None if ref_lufs is None or test_lufs is None else abs(ref_lufs - test_lufs)
 
-    ref_peak = get_metric(summary, "audio.reference.true_peak_dbtp")
-    test_peak = get_metric(summary, "audio.test.true_peak_dbtp")
+    ref_peak = get_metric(summary, REF_PEAK)
+    test_peak = get_metric(summary, TEST_PEAK)
     peak_delta = None if ref_peak is None or test_peak is None else abs(ref_peak - test_peak)
 
     check_min("ssim_avg", ssim_avg, float(thresholds["ssim_min"]))
@@ -108,7 +115,7 @@ def main() -> int:
             "threshold": float(thresholds["vmaf_min"]),
             "status": "missing",
         })
-        if args.strict:
+        if strict:
             failures += 1
 
     check_max("audio_lufs_delta", lufs_delta, float(thresholds["audio_lufs_delta_max"]))
@@ -116,20 +123,38 @@ def main() -> int:
 
     output = {
         "label": summary.get("label"),
-        "summary_path": str(Path(args.summary).resolve()),
+        "summary_path": str(summary_path.resolve()),
         "thresholds": thresholds,
         "checks": results,
         "status": "fail" if failures else "pass",
         "failures": failures,
     }
 
-    out_path = Path(args.out) if args.out else Path(args.summary).with_name("pass_fail.json")
-    out_path.write_text(json.dumps(output, indent=2))
+    if out_path is None:
+        out_path = summary_path.with_name("pass_fail.json")
+    write_json(out_path, output)
     print(f"Wrote {out_path}")
 
     return 1 if failures else 0
 
 
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Check summary.json against thresholds.")
+    parser.add_argument("summary", help="Path to summary.json")
+    parser.add_argument("--thresholds", help="Path to thresholds.json")
+    parser.add_argument("--out", help="Output JSON path", default="")
+    parser.add_argument("--strict", action="store_true", help="Fail if a metric is missing")
+
+    args = parser.parse_args()
+
+    return run(
+        Path(args.summary),
+        Path(args.thresholds) if args.thresholds else None,
+        Path(args.out) if args.out else None,
+        args.strict,
+    )
+
+
 if __name__ == "__main__":
     try:
         raise SystemExit(main())
@@ -8,20 +8,32 @@ Requires: ffmpeg on PATH. libvmaf is optional.
 from __future__ import annotations
 
 import argparse
-import json
+import functools
+import mmap
 import os
 import re
 import shutil
+import statistics
 import subprocess
 import sys
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Pattern, Tuple
 
+from jsonio import read_json, write_json
 
-SSIM_RE = re.compile(r"All:(?P<all>[0-9.]+)")
-PSNR_RE = re.compile(r"psnr_avg:(?P<avg>(?:inf|[0-9.]+))")
+
+SSIM_RE = re.compile(rb"All:(?P<value>[0-9.]+)")
+PSNR_RE = re.compile(rb"psnr_avg:(?P<value>(?:inf|[0-9.]+))")
 EBU_I_RE = re.compile(r"\bI:\s*(?P<i>-?\d+(?:\.\d+)?)\s*LUFS")
 EBU_PEAK_RE = re.compile(r"\bPeak:\s*(?P<peak>-?\d+(?:\.\d+)?)\s*dBTP")
+# ffmpeg prefixes filter log lines with "[<instance> @ 0x...]", where the
+# instance is either the "@" id itself or "Parsed_<filter>@<id>_<n>" depending
+# on the ffmpeg version.
+EBU_INSTANCE_RE = re.compile(r"^\[\S*ebur128_(?P<tag>ref|test)(?:_\d+)? @ ")
+
+
+# Number of trailing ffmpeg stderr lines included in a RunError.
+STDERR_TAIL_LINES = 20
 
 
 class RunError(Exception):
@@ -33,6 +45,7 @@ def check_ffmpeg() -> None:
         raise RunError("ffmpeg not found in PATH. Install ffmpeg to use this script.")
 
 
+@functools.lru_cache(maxsize=1)
 def has_libvmaf() -> bool:
     try:
         result = subprocess.run(
@@ -46,54 +59,45 @@ def has_libvmaf() -> bool:
     return "libvmaf" in result.stdout
 
 
-def run(cmd: List[str]) -> None:
-    try:
-        subprocess.run(cmd, check=True)
-    except subprocess.CalledProcessError as exc:
-        raise RunError(f"Command failed: {' '.join(cmd)}") from exc
-
-
 def run_capture(cmd: List[str]) -> str:
     try:
         result = subprocess.run(cmd, check=True, capture_output=True, text=True)
     except subprocess.CalledProcessError as exc:
-        raise RunError(f"Command failed: {' '.join(cmd)}") from exc
+        message = f"Command failed: {' '.join(cmd)}"
+        stderr_tail = "\n".join((exc.stderr or "").strip().splitlines()[-STDERR_TAIL_LINES:])
+        if stderr_tail:
+            message += f"\n{stderr_tail}"
+        raise RunError(message) from exc
     return result.stderr + "\n" + result.stdout
 
 
-def parse_ssim(path: Path) -> Dict[str, Any]:
-    values: List[float] = []
-    if not path.exists():
+def parse_stats(path: Path, pattern: Pattern[bytes]) -> Dict[str, Any]:
+    # Empty logs (ffmpeg failed before the first frame) cannot be mapped.
+    if not path.exists() or path.stat().st_size == 0:
         return {"samples": 0, "average": None}
-    for line in path.read_text().splitlines():
-        match = SSIM_RE.search(line)
-        if match:
-            values.append(float(match.group("all")))
+    with path.open("rb") as handle, mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        values = [
+            float(match.group("value"))
+            for match in pattern.finditer(mm)
+            if match.group("value") != b"inf"
+        ]
     if not values:
         return {"samples": 0, "average": None}
-    return {"samples": len(values), "average": sum(values) / len(values)}
+    return {"samples": len(values), "average": statistics.fmean(values)}
+
+
+def parse_ssim(path: Path) -> Dict[str, Any]:
+    return parse_stats(path, SSIM_RE)
 
 
 def parse_psnr(path: Path) -> Dict[str, Any]:
-    values: List[float] = []
-    if not path.exists():
-        return {"samples": 0, "average": None}
-    for line in path.read_text().splitlines():
-        match = PSNR_RE.search(line)
-        if match:
-            value = match.group("avg")
-            if value == "inf":
-                continue
-            values.append(float(value))
-    if not values:
-        return {"samples": 0, "average": None}
-    return {"samples": len(values), "average": sum(values) / len(values)}
+    return parse_stats(path, PSNR_RE)
 
 
 def parse_vmaf(path: Path) -> Dict[str, Any]:
     if not path.exists():
         return {"samples": 0, "average": None, "min": None, "max": None}
-    data = json.loads(path.read_text())
+    data = read_json(path)
     frames = data.get("frames", [])
     values = [frame.get("metrics", {}).get("vmaf") for frame in frames]
     values = [value for value in values if isinstance(value, (int, float))]
@@ -120,6 +124,25 @@ def parse_ebur128(output: str) -> Dict[str, Optional[float]]:
     return {"integrated_lufs": integrated, "true_peak_dbtp": true_peak}
 
 
+def split_ebur128_output(output: str) -> Dict[str, str]:
+    """Group ffmpeg log lines by the tagged ebur128 instance that emitted them.
+
+    Only the first line of a multi-line message carries the filter prefix, so
+    indented or blank continuation lines stay with the preceding instance.
+    """
+    sections: Dict[str, List[str]] = {}
+    current: Optional[str] = None
+    for line in output.splitlines():
+        match = EBU_INSTANCE_RE.match(line)
+        if match:
+            current = match.group("tag")
+        elif line and not line[0].isspace():
+            current = None
+        if current is not None:
+            sections.setdefault(current, []).append(line)
+    return {tag: "\n".join(lines) + "\n" for tag, lines in sections.items()}
+
+
 def build_video_filter(width: Optional[int], height: Optional[int], fps: Optional[float]) -> str:
     parts = []
     if width and height:
@@ -173,6 +196,12 @@ def main() -> None:
             f"[v0c][v1c]libvmaf=log_path={vmaf_path}:log_fmt=json"
         )
 
+    # Loudness is measured in the same pass as the video metrics so each input
+    # is demuxed and decoded once. The instance tags let the two ebur128
+    # summaries be told apart in the shared log output.
+    filter_parts.append(f"[0:a]aresample={args.audio_rate},ebur128@ebur128_ref=peak=true")
+    filter_parts.append(f"[1:a]aresample={args.audio_rate},ebur128@ebur128_test=peak=true")
+
     filter_complex = ";".join(filter_parts)
 
     input_opts: List[str] = []
@@ -195,6 +224,7 @@ def main() -> None:
     cmd = [
         "ffmpeg",
         "-hide_banner",
+        "-nostats",
         "-y",
         *ref_input,
         *test_input,
@@ -205,37 +235,20 @@ def main() -> None:
         "-",
     ]
 
-    run(cmd)
+    audio_sections = split_ebur128_output(run_capture(cmd))
+    missing = [tag for tag in ("ref", "test") if tag not in audio_sections]
+    if missing:
+        raise RunError(
+            f"No ebur128 output found for: {', '.join(missing)}. "
+            "This ffmpeg build may label filter log lines differently."
+        )
+    ref_audio_output = audio_sections["ref"]
+    test_audio_output = audio_sections["test"]
 
     ref_audio_log = metrics_dir / "ref_ebur128.log"
     test_audio_log = metrics_dir / "test_ebur128.log"
-
-    ref_audio_cmd = [
-        "ffmpeg",
-        "-hide_banner",
-        "-y",
-        *ref_input,
-        "-filter_complex",
-        f"[0:a]aresample={args.audio_rate},ebur128=peak=true:framelog={ref_audio_log}",
-        "-f",
-        "null",
-        "-",
-    ]
-
-    test_audio_cmd = [
-        "ffmpeg",
-        "-hide_banner",
-        "-y",
-        *test_input,
-        "-filter_complex",
-        f"[0:a]aresample={args.audio_rate},ebur128=peak=true:framelog={test_audio_log}",
-        "-f",
-        "null",
-        "-",
-    ]
-
-    ref_audio_output = run_capture(ref_audio_cmd)
-    test_audio_output = run_capture(test_audio_cmd)
+    ref_audio_log.write_text(ref_audio_output)
+    test_audio_log.write_text(test_audio_output)
 
     summary = {
         "label": args.label,
@@ -272,7 +285,7 @@ def main() -> None:
     }
 
     summary_path = out_dir / "summary.json"
-    summary_path.write_text(json.dumps(summary, indent=2))
+    write_json(summary_path, summary)
 
     print(f"Wrote summary to {summary_path}")
 
@@ -0,0 +1,41 @@
+"""
+JSON helpers shared by the A/V comparison scripts.
+
+Reads use orjson when it is installed, falling back to the standard library
+for input orjson rejects (NaN/Infinity), so the accepted inputs do not depend
+on which packages are present. Writes always use the standard library: the
+reports are small, and orjson would change their content (raw UTF-8 instead
+of \\u escapes, null instead of Infinity/NaN).
+"""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # orjson is optional.
+    orjson = None
+
+
+def loads(data: bytes) -> Any:
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(data)
+
+
+def dumps(payload: Any) -> bytes:
+    return json.dumps(payload, indent=2).encode()
+
+
+def read_json(path: Path) -> Any:
+    return loads(path.read_bytes())
+
+
+def write_json(path: Path, payload: Any) -> None:
+    path.write_bytes(dumps(payload))